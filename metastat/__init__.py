@@ -5,9 +5,9 @@ import json
 from PyQt5 import (
     QtCore,
     QtGui,
+    QtNetwork,
     QtWidgets,
 )
-from eddy.core.commands.iri import CommandIRIAddAnnotationAssertion
 from eddy.core.commands.edges import CommandEdgeAdd
 from eddy.core.commands.nodes import CommandNodeAdd
 from eddy.core.datatypes.graphol import Item
@@ -26,6 +26,7 @@ from eddy.core.owl import (
 from eddy.core.plugin import AbstractPlugin
 from eddy.ui.dock import DockWidget
 
+from .commands import CommandIRIAddAnnotationAssertions
 from .model import (
     LiteralValue,
     NamedEntity,
@@ -40,6 +41,9 @@ class MetastatPlugin(AbstractPlugin):
     """
     Search and import ontology metadata from an external service.
     """
+    METASTAT_NAMESPACE = 'http://www.istat.it/metastat/'
+    NETWORK_CACHE_SIZE = 50 * 1024 * 1024  # Bytes of repository data kept on disk
+
     sgnProjectChanged = QtCore.pyqtSignal(str)
     sgnUpdateState = QtCore.pyqtSignal()
 
@@ -50,6 +54,10 @@ class MetastatPlugin(AbstractPlugin):
         :type session: Session
         """
         super().__init__(spec, session)
+        self._prefixNamespaces = None  # type: set[str] | None
+        self._originIRI = None  # type: IRI | None
+        self._entityTypeDialog = None  # type: EntityTypeDialog | None
+        self.nmanager = None  # type: QtNetwork.QNetworkAccessManager | None
 
     #############################################
     #   EVENTS
@@ -81,49 +89,24 @@ class MetastatPlugin(AbstractPlugin):
     @QtCore.pyqtSlot(QtWidgets.QGraphicsScene, QtWidgets.QGraphicsSceneDragDropEvent)
     def onDiagramDragDropEvent(self, diagram, event: QtWidgets.QGraphicsSceneDragDropEvent):
         # Show entity type selection diagram
-        if event.mimeData().hasFormat('application/json+metastat'):
-            entity = NamedEntity.from_dict(json.loads(event.mimeData().data('application/json+metastat').data()))
-            dialog = EntityTypeDialog(entity, self.project.session)
+        mimeData = event.mimeData()
+        if mimeData.hasFormat('application/json+metastat'):
+            cache = {}  # Entities built during this drop, by id
+            entity = NamedEntity.from_dict(json.loads(mimeData.data('application/json+metastat').data()), cache=cache)
+            dialog = self.entityTypeDialog(entity)
             if dialog.exec_() == QtWidgets.QDialog.Accepted:
                 self.session.undostack.beginMacro('metastat entity drag&drop')
-                subject = self.session.project.getIRI('http://www.istat.it/metastat/' + str(entity.id))
-                predicate = self.session.project.getIRI('urn:x-graphol:origin')
-                object_ = IRI('http://www.istat.it/metastat/')
-                ast = AnnotationAssertion(subject, predicate, object_)
-                cmd = CommandIRIAddAnnotationAssertion(self.session.project, subject, ast)
-                self.session.undostack.push(cmd)
+                subject = self.session.project.getIRI(f'{self.METASTAT_NAMESPACE}{entity.id}')
+                origin = self.session.project.getIRI('urn:x-graphol:origin')
+                self.addEntityAnnotations(subject, entity, origin)
 
                 # Add metastat prefix if not present
-                if not any([ns == 'http://www.istat.it/metastat/' for _, ns in self.project.prefixDictItems()]):
-                    self.project.setPrefix('metastat', 'http://www.istat.it/metastat/')
-
-                # Add lemmas for entity as rdfs:label
-                for lemma in entity.lemma:
-                    ast = AnnotationAssertion(
-                        subject,
-                        AnnotationAssertionProperty.Label.value,
-                        lemma.value,
-                        None,
-                        lemma.lang,
-                    )
-                    cmd = CommandIRIAddAnnotationAssertion(self.session.project, subject, ast)
-                    self.session.undostack.push(cmd)
-
-                # Add definitions for entity as rdfs:comment
-                for description in entity.description:
-                    ast = AnnotationAssertion(
-                        subject,
-                        AnnotationAssertionProperty.Comment.value,
-                        description.value,
-                        None,
-                        description.lang,
-                    )
-                    cmd = CommandIRIAddAnnotationAssertion(self.session.project, subject, ast)
-                    self.session.undostack.push(cmd)
+                if self.METASTAT_NAMESPACE not in self.prefixNamespaces():
+                    self.project.setPrefix('metastat', self.METASTAT_NAMESPACE)
 
                 # Add node with selected type
                 snapToGrid = self.session.action('toggle_grid').isChecked()
-                node = diagram.factory.create(Item.valueOf(str(dialog.button_group.checkedId())))
+                node = diagram.factory.create(Item(dialog.button_group.checkedId()))
                 node.iri = subject
                 node.setPos(snap(event.scenePos(), Diagram.GridSize, snapToGrid))
                 self.session.undostack.push(CommandNodeAdd(diagram, node))
@@ -141,56 +124,25 @@ class MetastatPlugin(AbstractPlugin):
                             self.session.undostack.push(CommandEdgeAdd(diagram, edge))
                     # 2. If related entities insertion is selected import as generalization
                     if dialog.related_checkbox.isChecked():
-                        hierSize = len(entity.related)
+                        related = self.relatedEntities(entity, cache)
                         unionNode = diagram.factory.create(Item.UnionNode)
                         unionNode.setPos(snap(event.scenePos() + QtCore.QPoint(0, 150), Diagram.GridSize, snapToGrid))
                         isaEdge = diagram.factory.create(Item.InclusionEdge, source=unionNode, target=node)
                         self.session.undostack.push(CommandEdgeAdd(diagram, isaEdge))
                         self.session.undostack.push(CommandNodeAdd(diagram, unionNode))
                         unionPos = unionNode.pos()
-                        for i in range(hierSize):
+                        for i, (childId, childEntity) in enumerate(related):
                             childNode = diagram.factory.create(Item.ConceptNode)
                             childNode.setPos(QtCore.QPointF(unionPos.x() + i * 150, unionPos.y() + 150))
-                            childNode.iri = self.session.project.getIRI('http://www.istat.it/metastat/' + entity.related[i])
-                            childEntity = NamedEntity.from_dict(self.widget('metastat').entities.get(entity.related[i]))
-
+                            childNode.iri = self.session.project.getIRI(f'{self.METASTAT_NAMESPACE}{childId}')
                             # Add annotations for related entity node
-                            subject = childNode.iri
-                            predicate = self.session.project.getIRI('urn:x-graphol:origin')
-                            object_ = IRI('http://www.istat.it/metastat/')
-                            ast = AnnotationAssertion(subject, predicate, object_)
-                            cmd = CommandIRIAddAnnotationAssertion(self.session.project, subject, ast)
-                            self.session.undostack.push(cmd)
-
-                            # Add lemmas for related entity as rdfs:label
-                            for lemma in childEntity.lemma:
-                                ast = AnnotationAssertion(
-                                    subject,
-                                    AnnotationAssertionProperty.Label.value,
-                                    lemma.value,
-                                    None,
-                                    lemma.lang,
-                                )
-                                cmd = CommandIRIAddAnnotationAssertion(self.session.project, subject, ast)
-                                self.session.undostack.push(cmd)
-
-                            # Add definitions for related entity as rdfs:comment
-                            for definition in childEntity.definition:
-                                ast = AnnotationAssertion(
-                                    subject,
-                                    AnnotationAssertionProperty.Comment.value,
-                                    definition.value,
-                                    None,
-                                    definition.lang,
-                                )
-                                cmd = CommandIRIAddAnnotationAssertion(self.session.project, subject, ast)
-                                self.session.undostack.push(cmd)
+                            self.addEntityAnnotations(childNode.iri, childEntity, origin)
                             self.session.undostack.push(CommandNodeAdd(diagram, childNode))
                             inputEdge = diagram.factory.create(Item.InputEdge, source=childNode, target=unionNode)
                             self.session.undostack.push(CommandEdgeAdd(diagram, inputEdge))
                 elif node.Type == Item.RoleNode and dialog.related_checkbox.isChecked():
                     # If related entities insertion is selected import them as domain and, if available, range
-                    for i, ent_id in enumerate(entity.related[:2]):
+                    for i, (ent_id, typeEntity) in enumerate(self.relatedEntities(entity, cache)[:2]):
                         if i == 0:
                             restrNode = diagram.factory.create(Item.DomainRestrictionNode)
                             restrNode.setPos(snap(
@@ -210,40 +162,9 @@ class MetastatPlugin(AbstractPlugin):
                             typeNode.setPos(QtCore.QPointF(restrNode.x() - 100, restrNode.y()))
                         else:
                             typeNode.setPos(QtCore.QPointF(restrNode.x() + 100, restrNode.y()))
-                        typeNode.iri = self.session.project.getIRI('http://www.istat.it/metastat/' + ent_id)
-                        typeEntity = NamedEntity.from_dict(self.widget('metastat').entities.get(ent_id))
-
+                        typeNode.iri = self.session.project.getIRI(f'{self.METASTAT_NAMESPACE}{ent_id}')
                         # Add annotations for related entity node
-                        subject = typeNode.iri
-                        predicate = self.session.project.getIRI('urn:x-graphol:origin')
-                        object_ = IRI('http://www.istat.it/metastat/')
-                        ast = AnnotationAssertion(subject, predicate, object_)
-                        cmd = CommandIRIAddAnnotationAssertion(self.session.project, subject, ast)
-                        self.session.undostack.push(cmd)
-
-                        # Add lemmas for related entity as rdfs:label
-                        for lemma in typeEntity.lemma:
-                            ast = AnnotationAssertion(
-                                subject,
-                                AnnotationAssertionProperty.Label.value,
-                                lemma.value,
-                                None,
-                                lemma.lang,
-                            )
-                            cmd = CommandIRIAddAnnotationAssertion(self.session.project, subject, ast)
-                            self.session.undostack.push(cmd)
-
-                        # Add definitions for related entity as rdfs:comment
-                        for definition in typeEntity.definition:
-                            ast = AnnotationAssertion(
-                                subject,
-                                AnnotationAssertionProperty.Comment.value,
-                                definition.value,
-                                None,
-                                definition.lang,
-                            )
-                            cmd = CommandIRIAddAnnotationAssertion(self.session.project, subject, ast)
-                            self.session.undostack.push(cmd)
+                        self.addEntityAnnotations(typeNode.iri, typeEntity, origin)
                         self.session.undostack.push(CommandNodeAdd(diagram, typeNode))
                         isaEdge = diagram.factory.create(Item.InclusionEdge, source=restrNode, target=typeNode)
                         self.session.undostack.push(CommandEdgeAdd(diagram, isaEdge))
@@ -271,11 +192,20 @@ class MetastatPlugin(AbstractPlugin):
         disconnect(diagram.sgnDragDropEvent, self.onDiagramDragDropEvent)
         disconnect(diagram.sgnModeChanged, self.onDiagramModeChanged)
 
+    @QtCore.pyqtSlot()
+    @QtCore.pyqtSlot(str)
+    @QtCore.pyqtSlot(str, str)
+    def onPrefixChanged(self, _name: str = None, _ns: str = None):
+        """
+        Executed when a project prefix is added, modified or removed.
+        """
+        self._prefixNamespaces = None
+
     @QtCore.pyqtSlot(str)
     def onRenderingModified(self, render):
         """Executed when the IRI rendering changes."""
         widget = self.widget('metastat')  # type: MetastatWidget
-        widget.redraw()
+        widget.onRenderingModified(render)
 
     @QtCore.pyqtSlot()
     def onSessionReady(self):
@@ -287,6 +217,9 @@ class MetastatPlugin(AbstractPlugin):
         self.debug('Connecting to project: %s', self.project.name)
         connect(self.project.sgnDiagramAdded, self.onDiagramAdded)
         connect(self.project.sgnDiagramRemoved, self.onDiagramRemoved)
+        connect(self.project.sgnPrefixAdded, self.onPrefixChanged)
+        connect(self.project.sgnPrefixModified, self.onPrefixChanged)
+        connect(self.project.sgnPrefixRemoved, self.onPrefixChanged)
         #connect(self.project.sgnPrefixAdded, widget.onPrefixChanged)
         #connect(self.project.sgnPrefixModified, widget.onPrefixChanged)
         #connect(self.project.sgnPrefixRemoved, widget.onPrefixChanged)
@@ -303,6 +236,65 @@ class MetastatPlugin(AbstractPlugin):
         """
         pass
 
+    #############################################
+    #   INTERFACE
+    #################################
+
+    def addEntityAnnotations(self, subject: IRI, entity: NamedEntity, predicate: IRI) -> None:
+        """
+        Add the metastat origin (through the given predicate), lemmas (as rdfs:label)
+        and descriptions (as rdfs:comment) of the given entity to the subject IRI
+        using a single undo command.
+        """
+        label = AnnotationAssertionProperty.Label.value
+        comment = AnnotationAssertionProperty.Comment.value
+        assertions = [AnnotationAssertion(subject, predicate, self._originIRI)]
+        assertions.extend(
+            AnnotationAssertion(subject, label, lemma.value, None, lemma.lang)
+            for lemma in entity.lemma
+        )
+        assertions.extend(
+            AnnotationAssertion(subject, comment, desc.value, None, desc.lang)
+            for desc in entity.description
+        )
+        cmd = CommandIRIAddAnnotationAssertions(self.session.project, subject, assertions)
+        self.session.undostack.push(cmd)
+
+    def relatedEntities(self, entity: NamedEntity, cache: dict) -> list[tuple[str, NamedEntity]]:
+        """
+        Returns the (id, entity) pairs of the entities related to the given one,
+        skipping the ids missing from the loaded repository data.
+        """
+        entities = self.widget('metastat').entities or {}
+        related = []
+        for relId in entity.related:
+            data = entities.get(relId)
+            if data is None:
+                LOGGER.warning('Unknown related entity "%s" of entity "%s"', relId, entity.id)
+                continue
+            related.append((relId, NamedEntity.from_dict(data, cache=cache)))
+        return related
+
+    def entityTypeDialog(self, entity: NamedEntity) -> EntityTypeDialog:
+        """
+        Returns the entity type selection dialog, reset for the given entity.
+        The dialog is created on first use and reused across drops.
+        """
+        if self._entityTypeDialog is None:
+            self._entityTypeDialog = EntityTypeDialog(entity, self.session)
+        else:
+            self._entityTypeDialog.reset(entity)
+        return self._entityTypeDialog
+
+    def prefixNamespaces(self) -> set[str]:
+        """
+        Returns the set of namespaces bound to a prefix in the active project.
+        The set is cached until a project prefix changes.
+        """
+        if self._prefixNamespaces is None:
+            self._prefixNamespaces = {ns for _, ns in self.project.prefixDictItems()}
+        return self._prefixNamespaces
+
     #############################################
     #   HOOKS
     #################################
@@ -319,23 +311,53 @@ class MetastatPlugin(AbstractPlugin):
 
         # DISCONNECT FROM CURRENT PROJECT
         widget = self.widget('metastat')  # type: MetastatWidget
+        self.debug('Stopping repository data parsing')
+        widget.stopParsing()
         self.debug('Disconnecting from project: %s', self.project.name)
+        disconnect(self.project.sgnPrefixAdded, self.onPrefixChanged)
+        disconnect(self.project.sgnPrefixModified, self.onPrefixChanged)
+        disconnect(self.project.sgnPrefixRemoved, self.onPrefixChanged)
         #disconnect(self.project.sgnPrefixAdded, widget.onPrefixChanged)
         #disconnect(self.project.sgnPrefixModified, widget.onPrefixChanged)
         #disconnect(self.project.sgnPrefixRemoved, widget.onPrefixChanged)
 
+        # DISPOSE THE ENTITY TYPE DIALOG
+        if self._entityTypeDialog is not None:
+            self._entityTypeDialog.deleteLater()
+            self._entityTypeDialog = None
+
         # DISCONNECT FROM ACTIVE SESSION
         self.debug('Disconnecting from active session')
         disconnect(self.session.sgnReady, self.onSessionReady)
         disconnect(self.session.sgnUpdateState, self.doUpdateState)
         disconnect(self.session.sgnRenderingModified, self.onRenderingModified)
 
+        # DISPOSE THE NETWORK ACCESS MANAGER
+        if self.nmanager is not None:
+            self.debug('Disposing network access manager')
+            self.nmanager.deleteLater()
+            self.nmanager = None
+
     def start(self):
         """
         Perform initialization tasks for the plugin.
         """
         # INITIALIZE THE WIDGET
         self.debug('Starting Metastat plugin')
+        self._originIRI = IRI(self.METASTAT_NAMESPACE)
+
+        # CREATE THE NETWORK ACCESS MANAGER
+        # The widget fetches repository data as soon as it is created,
+        # so the manager must be in place before that. It has its own
+        # disk cache, to leave the caching of the session manager untouched.
+        self.debug('Creating network access manager')
+        self.nmanager = QtNetwork.QNetworkAccessManager(self)
+        location = QtCore.QStandardPaths.writableLocation(QtCore.QStandardPaths.CacheLocation)
+        cache = QtNetwork.QNetworkDiskCache(self.nmanager)
+        cache.setCacheDirectory(QtCore.QDir(location).filePath('metastat'))
+        cache.setMaximumCacheSize(self.NETWORK_CACHE_SIZE)
+        self.nmanager.setCache(cache)
+
         widget = MetastatWidget(self)
         widget.setObjectName('metastat')
         self.addWidget(widget)
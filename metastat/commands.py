@@ -0,0 +1,36 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import annotations
+
+from PyQt5 import QtWidgets
+
+
+class CommandIRIAddAnnotationAssertions(QtWidgets.QUndoCommand):
+    """
+    This command is used to add a batch of annotation assertions to an IRI in a single undo step.
+    """
+
+    def __init__(self, project, iri, assertions, parent=None) -> None:
+        """
+        Initialize the command.
+        :type project: Project
+        :type iri: IRI
+        :type assertions: list[AnnotationAssertion]
+        :type parent: QUndoCommand
+        """
+        super().__init__(f'add {len(assertions)} annotation assertions to {iri}', parent)
+        self.project = project
+        self.iri = iri
+        self.assertions = list(assertions)
+
+    def redo(self) -> None:
+        """redo the command"""
+        for assertion in self.assertions:
+            self.iri.addAnnotationAssertion(assertion)
+        self.project.sgnUpdated.emit()
+
+    def undo(self) -> None:
+        """undo the command"""
+        for assertion in reversed(self.assertions):
+            self.iri.removeAnnotationAssertion(assertion)
+        self.project.sgnUpdated.emit()
@@ -1,6 +1,9 @@
 # SPDX-License-Identifier: GPL-3.0-or-later
 
-import textwrap
+import bisect
+import functools
+import re
+from typing import Iterable
 
 from PyQt5 import (
     QtCore,
@@ -14,16 +17,35 @@ from eddy.ui.fields import StringField
 
 from .settings import Repository
 
+RE_REPOSITORY_URI = re.compile(r'^https?://[^\s/?#]+(?:[/?#]\S*)?$', re.IGNORECASE)
+
+MSG_INVALID_REPOSITORY_NAME = """
+The repository name can be any string that is used to easily
+reference the repository.
+"""
+MSG_INVALID_REPOSITORY_URI = """
+The repository URI is the base path at which the repository API is accessible,
+and must include protocol, domain and port (if any).
+
+e.g.:
+    https://example.com:5000/
+    https://example.com/myrepo/
+"""
+MSG_DUPLICATE_REPOSITORY = """
+Repository names must be unique to avoid ambiguity in the user interface.
+"""
+
 
 class EntityTypeDialog(QtWidgets.QDialog):
     """Dialog to select entity type in the ontology when dropped onto a diagram."""
 
     def __init__(self, entity, parent: QtWidgets.QWidget = None):
         super().__init__(parent)
-        self.entity = entity
+        self.entity = None
 
         layout = QtWidgets.QVBoxLayout(self)
-        layout.addWidget(QtWidgets.QLabel(f"Choose an Entity type for {entity.id}:"))
+        self.label = QtWidgets.QLabel(self)
+        layout.addWidget(self.label)
         class_rb = QtWidgets.QRadioButton("Class")
         object_property_rb = QtWidgets.QRadioButton("Object Property")
         data_property_rb = QtWidgets.QRadioButton("Data Property")
@@ -34,9 +56,9 @@ class EntityTypeDialog(QtWidgets.QDialog):
         self.button_group.addButton(object_property_rb, Item.RoleNode)
         self.button_group.addButton(data_property_rb, Item.AttributeNode)
         self.button_group.addButton(individual_rb, Item.IndividualNode)
-        for rb in [class_rb, object_property_rb, data_property_rb, individual_rb]:
-            connect(rb.toggled, self.doUpdateState)
+        for rb in (class_rb, object_property_rb, data_property_rb, individual_rb):
             layout.addWidget(rb)
+        connect(self.button_group.buttonToggled, self.doUpdateState)
         self.related_checkbox = QtWidgets.QCheckBox("Include related entities", self)
         layout.addWidget(self.related_checkbox)
         self.btns = QtWidgets.QDialogButtonBox(QtWidgets.QDialogButtonBox.Ok | QtWidgets.QDialogButtonBox.Cancel)
@@ -45,16 +67,102 @@ class EntityTypeDialog(QtWidgets.QDialog):
         connect(self.btns.rejected, self.reject)
         self.setWindowTitle("Choose Entity type")
         self.setModal(True)
-        self.doUpdateState(False)
+        self.reset(entity)
+
+    #############################################
+    #   INTERFACE
+    #################################
+
+    def reset(self, entity) -> None:
+        """Clear the current selection so that the dialog can be reused for the given entity."""
+        self.entity = entity
+        self.label.setText(f"Choose an Entity type for {entity.id}:")
+        self.button_group.setExclusive(False)
+        for button in self.button_group.buttons():
+            button.setChecked(False)
+        self.button_group.setExclusive(True)
+        self.related_checkbox.setChecked(False)
+        self.doUpdateState()
 
     #############################################
     #   SLOTS
     #################################
 
-    @QtCore.pyqtSlot(bool)
-    def doUpdateState(self, _checked: bool):
+    @QtCore.pyqtSlot(QtWidgets.QAbstractButton, bool)
+    def doUpdateState(self, _button: QtWidgets.QAbstractButton = None, _checked: bool = False):
         selected = self.button_group.checkedButton() is not None
-        self.btns.button(QtWidgets.QDialogButtonBox.Ok).setEnabled(selected)
+        okBtn = self.btns.button(QtWidgets.QDialogButtonBox.Ok)
+        if okBtn.isEnabled() != selected:
+            okBtn.setEnabled(selected)
+
+
+class RepositoryTableModel(QtCore.QAbstractTableModel):
+    """Table model exposing the list of repositories, sorted by name."""
+    Headers = ('Name', 'Endpoint')
+
+    def __init__(self, repositories: list[Repository] = None, parent: QtCore.QObject = None) -> None:
+        """Initialize the repository table model."""
+        super().__init__(parent)
+        self._repos = sorted(repositories or [], key=lambda r: r.name)
+
+    #############################################
+    #   INTERFACE
+    #################################
+
+    def columnCount(self, parent: QtCore.QModelIndex = QtCore.QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.Headers)
+
+    def data(self, index: QtCore.QModelIndex, role: int = QtCore.Qt.ItemDataRole.DisplayRole):
+        if index.isValid() and role == QtCore.Qt.ItemDataRole.DisplayRole:
+            repo = self._repos[index.row()]
+            return repo.name if index.column() == 0 else repo.uri
+        return None
+
+    def flags(self, index: QtCore.QModelIndex) -> QtCore.Qt.ItemFlags:
+        return QtCore.Qt.ItemFlag.ItemIsEnabled | QtCore.Qt.ItemFlag.ItemIsSelectable
+
+    def headerData(self, section: int, orientation: QtCore.Qt.Orientation,
+                   role: int = QtCore.Qt.ItemDataRole.DisplayRole):
+        if orientation == QtCore.Qt.Orientation.Horizontal and role == QtCore.Qt.ItemDataRole.DisplayRole:
+            return self.Headers[section]
+        return None
+
+    def rowCount(self, parent: QtCore.QModelIndex = QtCore.QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._repos)
+
+    def addRepository(self, repo: Repository) -> int:
+        """Insert the given repository keeping the list sorted, and return its row."""
+        row = bisect.bisect_right([r.name for r in self._repos], repo.name)
+        self.beginInsertRows(QtCore.QModelIndex(), row, row)
+        self._repos.insert(row, repo)
+        self.endInsertRows()
+        return row
+
+    def removeRepositories(self, rows: Iterable[int]) -> None:
+        """Remove the repositories at the given rows."""
+        # Remove contiguous runs of rows bottom-up, one notification per run
+        rows = sorted(set(rows), reverse=True)
+        while rows:
+            last = first = rows.pop(0)
+            while rows and rows[0] == first - 1:
+                first = rows.pop(0)
+            self.beginRemoveRows(QtCore.QModelIndex(), first, last)
+            del self._repos[first:last + 1]
+            self.endRemoveRows()
+
+    def repositories(self) -> list[Repository]:
+        """Return the list of repositories in the model."""
+        return list(self._repos)
+
+    def repository(self, row: int) -> Repository:
+        """Return the repository at the given row."""
+        return self._repos[row]
+
+    def setRepositories(self, repositories: list[Repository]) -> None:
+        """Replace the content of the model with the given repositories."""
+        self.beginResetModel()
+        self._repos = sorted(repositories, key=lambda r: r.name)
+        self.endResetModel()
 
 
 class RepositoryManagerDialog(QtWidgets.QDialog, HasWidgetSystem):
@@ -65,8 +173,9 @@ class RepositoryManagerDialog(QtWidgets.QDialog, HasWidgetSystem):
         super().__init__(parent)
         self._editing_row = None
 
-        table = QtWidgets.QTableWidget(0, 2, objectName='repository_table_widget')
-        table.setHorizontalHeaderLabels(['Name', 'Endpoint'])
+        self.model = RepositoryTableModel(parent=self)
+        table = QtWidgets.QTableView(objectName='repository_table_widget')
+        table.setModel(self.model)
         table.horizontalHeader().setStretchLastSection(True)
         table.horizontalHeader().setSectionsClickable(False)
         table.horizontalHeader().setMinimumSectionSize(100)
@@ -74,7 +183,7 @@ class RepositoryManagerDialog(QtWidgets.QDialog, HasWidgetSystem):
         table.verticalHeader().setVisible(False)
         table.verticalHeader().setSectionsClickable(False)
         table.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
-        connect(table.itemSelectionChanged, self.doRepositorySelectionChanged)
+        connect(table.selectionModel().selectionChanged, self.doRepositorySelectionChanged)
         self.addWidget(table)
 
         delBtn = QtWidgets.QPushButton(  # noqa
@@ -142,7 +251,6 @@ class RepositoryManagerDialog(QtWidgets.QDialog, HasWidgetSystem):
         """Add a new repository or update the selected one."""
         nameField = self.widget('repository_name_field')
         uriField = self.widget('repository_uri_field')
-        table = self.widget('repository_table_widget')
 
         name = nameField.text().strip()
         uri = uriField.text().strip()
@@ -153,70 +261,45 @@ class RepositoryManagerDialog(QtWidgets.QDialog, HasWidgetSystem):
                 QtWidgets.QMessageBox.Warning,
                 'Invalid Repository Name',
                 'Please specify a repository name.',
-                informativeText=textwrap.dedent("""
-                The repository name can be any string that is used to easily
-                reference the repository.
-                """), parent=self,
+                informativeText=MSG_INVALID_REPOSITORY_NAME,
+                parent=self,
             )
             msgBox.open()
             return
 
-        if not QtCore.QUrl(uri).isValid():
+        if not isValidRepositoryUri(uri):
             msgBox = QtWidgets.QMessageBox(  # noqa
                 QtWidgets.QMessageBox.Warning,
                 'Invalid Repository URI',
                 'Please specify a valid repository URI.',
-                informativeText=textwrap.dedent("""
-                The repository URI is the base path at which the repository API is accessible,
-                and must include protocol, domain and port (if any).
-
-                e.g.:
-                    https://example.com:5000/
-                    https://example.com/myrepo/
-                """),
+                informativeText=MSG_INVALID_REPOSITORY_URI,
                 parent=self,
             )
             msgBox.open()
             return
 
-        existing_names = []
-        for row in range(table.rowCount()):
-            if row == self._editing_row:
-                continue
-            item = table.item(row, 0)
-            if item:
-                existing_names.append(item.text())
+        existing_names = set()
+        for row, repo in enumerate(self.model.repositories()):
+            if row != self._editing_row:
+                existing_names.add(repo.name)
 
         if name in existing_names:
             msgBox = QtWidgets.QMessageBox(  # noqa
                 QtWidgets.QMessageBox.Warning,
                 'Duplicate Repository Error',
                 f'A repository named {name} already exists.',
-                informativeText=textwrap.dedent("""
-                Repository names must be unique to avoid ambiguity in the user interface.
-                """),
+                informativeText=MSG_DUPLICATE_REPOSITORY,
                 parent=self,
             )
             msgBox.open()
             return
 
-        if self._editing_row is None:
-            row = table.rowCount()
-            table.insertRow(row)
-        else:
-            row = self._editing_row
-
-        table.setItem(row, 0, QtWidgets.QTableWidgetItem(name))
-        table.setItem(row, 1, QtWidgets.QTableWidgetItem(uri))
-
-        repos = []
-        for row in range(table.rowCount()):
-            repos.append(Repository(
-                name=table.item(row, 0).text(),
-                uri=table.item(row, 1).text(),
-            ))
-        Repository.save(repos)
-        self.doReloadRepositories()
+        if self._editing_row is not None:
+            self.model.removeRepositories([self._editing_row])
+        self.model.addRepository(Repository(name=name, uri=uri))
+        Repository.save(self.model.repositories())
+        self.widget('repository_table_widget').resizeColumnsToContents()
+        self.widget('repository_del_button').setEnabled(True)
         self.doClearEditor()
 
     @QtCore.pyqtSlot()
@@ -230,13 +313,13 @@ class RepositoryManagerDialog(QtWidgets.QDialog, HasWidgetSystem):
 
         nameField.clear()
         uriField.clear()
-        blocker = QtCore.QSignalBlocker(table)
+        blocker = QtCore.QSignalBlocker(table.selectionModel())
         table.clearSelection()
         del blocker
         addBtn.setText('Add')
 
-    @QtCore.pyqtSlot()
-    def doRepositorySelectionChanged(self):
+    @QtCore.pyqtSlot(QtCore.QItemSelection, QtCore.QItemSelection)
+    def doRepositorySelectionChanged(self, _selected, _deselected):
         """Populate the editor with the selected repository."""
         table = self.widget('repository_table_widget')
         selectedRows = table.selectionModel().selectedRows()
@@ -246,51 +329,35 @@ class RepositoryManagerDialog(QtWidgets.QDialog, HasWidgetSystem):
             return
 
         row = selectedRows[0].row()
-        nameItem = table.item(row, 0)
-        uriItem = table.item(row, 1)
-        if not nameItem or not uriItem:
-            self.doClearEditor()
-            return
-
+        repo = self.model.repository(row)
         self._editing_row = row
-        self.widget('repository_name_field').setText(nameItem.text())
-        self.widget('repository_uri_field').setText(uriItem.text())
+        self.widget('repository_name_field').setText(repo.name)
+        self.widget('repository_uri_field').setText(repo.uri)
         self.widget('repository_add_button').setText('Update')
 
     @QtCore.pyqtSlot()
     def doReloadRepositories(self):
         """Refresh the repository list from settings."""
-        widget = self.widget('repository_table_widget')  # type: QtWidgets.QTableWidget
-        widget.clearContents()
-        repos = Repository.load()
-        widget.setRowCount(len(repos))
-        for index, repo in enumerate(repos):
-            nameItem = QtWidgets.QTableWidgetItem(repo.name)
-            nameItem.setFlags(QtCore.Qt.ItemFlag.ItemIsEnabled | QtCore.Qt.ItemFlag.ItemIsSelectable)
-            uriItem = QtWidgets.QTableWidgetItem(repo.uri)
-            uriItem.setFlags(QtCore.Qt.ItemFlag.ItemIsEnabled | QtCore.Qt.ItemFlag.ItemIsSelectable)
-            widget.setItem(index, 0, nameItem)
-            widget.setItem(index, 1, uriItem)
+        widget = self.widget('repository_table_widget')  # type: QtWidgets.QTableView
+        self.model.setRepositories(Repository.load())
         widget.resizeColumnsToContents()
-        widget.sortItems(0)
-        self.widget('repository_del_button').setEnabled(len(repos) > 0)
+        self.widget('repository_del_button').setEnabled(self.model.rowCount() > 0)
 
     @QtCore.pyqtSlot()
     def doRemoveRepository(self):
         """Remove selected repositories."""
-        # Delete selected repositories
-        widget = self.widget('repository_table_widget')  # type: QtWidgets.QTableWidget
-        selections = widget.selectedRanges()
-        for sel in selections:
-            for row in range(sel.bottomRow(), sel.topRow() - 1, -1):
-                widget.removeRow(row)
+        widget = self.widget('repository_table_widget')  # type: QtWidgets.QTableView
+        self.model.removeRepositories(index.row() for index in widget.selectionModel().selectedRows())
         # Save the current repositories list
-        repos = []
-        for row in range(widget.rowCount()):
-            repos.append(Repository(
-                name=widget.item(row, 0).text(),
-                uri=widget.item(row, 1).text(),
-            ))
-        Repository.save(repos)
-        self.doReloadRepositories()
+        Repository.save(self.model.repositories())
+        self.widget('repository_del_button').setEnabled(self.model.rowCount() > 0)
         self.doClearEditor()
+
+
+@functools.lru_cache(maxsize=64)
+def isValidRepositoryUri(uri: str) -> bool:
+    """
+    Returns True if the given string is a valid repository URI.
+    Strings that are not an absolute http(s) URI are rejected before parsing them with QUrl.
+    """
+    return RE_REPOSITORY_URI.match(uri) is not None and QtCore.QUrl(uri).isValid()
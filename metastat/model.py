@@ -12,6 +12,7 @@ class Node(metaclass=ABCMeta):
     """
     Base class for any API object.
     """
+    __slots__ = ()
 
     @classmethod
     @abstractmethod
@@ -29,6 +30,7 @@ class LiteralValue(Node):
     """
     Represent a literal value associated with entity metadata.
     """
+    __slots__ = ('_value', '_lang')
 
     def __init__(self, value: str, language: str | None = None) -> None:
         """Initialize the literal."""
@@ -56,12 +58,13 @@ class LiteralValue(Node):
             "lang": self.lang,
         }
 
-    def __eq__(self, other: LiteralValue) -> bool:
-        return (
-                super().__eq__(other)
-                and self.value == other.value
-                and self.lang == other.lang
-        )
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, LiteralValue):
+            return NotImplemented
+        return self._value == other._value and self._lang == other._lang
+
+    def __hash__(self) -> int:
+        return hash((self._value, self._lang))
 
     def __repr__(self) -> str:
         return f'{self.__class__.__name__}("{self.value}"@{self.lang})'
@@ -71,6 +74,7 @@ class Owner(Node):
     """
     Represents process owners.
     """
+    __slots__ = ('_id', '_name')
 
     def __init__(self, id_: str, name: str) -> None:
         """Initialize the named entity."""
@@ -98,21 +102,30 @@ class Owner(Node):
             res['name'] = self.name
         return res
 
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Owner):
+            return NotImplemented
+        return self._id == other._id and self._name == other._name
+
+    def __hash__(self) -> int:
+        return hash((self._id, self._name))
+
 
 class NamedEntity(Node):
     """
     Represents entities that are uniquely identified with an IRI.
     """
+    __slots__ = ('_id', '_type', '_lemmas', '_descriptions', '_owner', '_related')
 
     def __init__(self, id_: str) -> None:
         """Initialize the named entity."""
         super().__init__()
         self._id = id_
         self._type = None
-        self._lemmas = []
-        self._descriptions = []
+        self._lemmas = ()
+        self._descriptions = ()
         self._owner = None
-        self._related = []
+        self._related = ()
 
     @property
     def id(self) -> str:
@@ -130,12 +143,12 @@ class NamedEntity(Node):
         return self._type
 
     @property
-    def lemma(self) -> list[LiteralValue]:
+    def lemma(self) -> tuple[LiteralValue, ...]:
         """Return the list of lemmas for this entity."""
         return self._lemmas
 
     @property
-    def description(self) -> list[LiteralValue]:
+    def description(self) -> tuple[LiteralValue, ...]:
         """Return the list of descriptions for this entity."""
         return self._descriptions
 
@@ -145,22 +158,33 @@ class NamedEntity(Node):
         return self._owner
 
     @property
-    def related(self) -> list[str]:
+    def related(self) -> tuple[str, ...]:
         """Return the list of related entity ids."""
         return self._related
 
     @classmethod
-    def from_dict(cls, data: dict, **kwargs) -> NamedEntity:
+    def from_dict(cls, data: dict, cache: dict | None = None, **kwargs) -> NamedEntity:
+        """
+        Creates a new entity from the given dict.
+        If `cache` is given, entities are memoized in it by id so that
+        repeated references within the same batch are built only once.
+        """
+        if cache is not None:
+            entity = cache.get(data["id"])
+            if entity is not None:
+                return entity
+        get = data.get
+        literal = LiteralValue.from_dict
         entity = NamedEntity(data["id"])
         entity._type = data["type"]
-        if "lemma" in data:
-            entity._lemmas.extend([LiteralValue.from_dict(l) for l in data["lemma"]])
-        if "description" in data:
-            entity._descriptions.extend([LiteralValue.from_dict(d) for d in data["description"]])
-        if "owner" in data:
-            entity._owner = Owner.from_dict(data["owner"])
-        if "related" in data:
-            entity._related.extend(data["related"])
+        entity._lemmas = tuple(map(literal, get("lemma", ())))
+        entity._descriptions = tuple(map(literal, get("description", ())))
+        entity._related = tuple(get("related", ()))
+        owner = get("owner")
+        if owner is not None:
+            entity._owner = Owner.from_dict(owner)
+        if cache is not None:
+            cache[entity.id] = entity
         return entity
 
     def to_dict(self, deep: bool = False) -> dict:
@@ -169,16 +193,43 @@ class NamedEntity(Node):
             "type": self.type,
         }
         if deep:
-            res |= {
-                "lemma": [a.to_dict() for a in self.lemma],
-                "description": [a.to_dict() for a in self.description],
-                "owner": self.owner.to_dict() if self.owner else {},
-                "related": self.related if self.related else []
-            }
+            res["lemma"] = [a.to_dict() for a in self._lemmas]
+            res["description"] = [a.to_dict() for a in self._descriptions]
+            res["owner"] = self._owner.to_dict() if self._owner else {}
+            res["related"] = list(self._related)
         return res
 
-    def __eq__(self, other) -> bool:
-        return super().__eq__(other) and self.id == other.id
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, NamedEntity):
+            return NotImplemented
+        return self._id == other._id
+
+    def __hash__(self) -> int:
+        return hash(self._id)
 
     def __repr__(self) -> str:
         return f"{self.__class__.__name__}({self.id}, \"{self.type}\")"
+
+
+def encode(obj: object) -> dict:
+    """
+    JSON encoder hook for API objects, to be used as `json.dumps(obj, default=encode)`.
+    Nested nodes are left to the encoder, so no intermediate dict tree is built.
+    """
+    if isinstance(obj, NamedEntity):
+        return {
+            "id": obj._id,
+            "type": obj._type,
+            "lemma": obj._lemmas,
+            "description": obj._descriptions,
+            "owner": obj._owner or {},
+            "related": obj._related,
+        }
+    if isinstance(obj, LiteralValue):
+        return {
+            "value": obj._value,
+            "lang": obj._lang,
+        }
+    if isinstance(obj, Owner):
+        return obj.to_dict()
+    raise TypeError(f'Object of type {obj.__class__.__name__} is not JSON serializable')
@@ -10,24 +10,26 @@ class RepositoryMonitor(QtCore.QObject):
     This class can be used to listen for changes in the saved repository list.
     """
     sgnUpdated = QtCore.pyqtSignal()
-    _instance = None
+    _instance = None  # type: RepositoryMonitor | None
 
-    def __new__(cls):
+    @classmethod
+    def instance(cls) -> RepositoryMonitor:
         """
-        Implements the singleton pattern.
+        Returns the shared monitor instance, creating it on first use.
         """
         if cls._instance is None:
-            cls._instance = super().__new__(cls)
+            cls._instance = cls()
         return cls._instance
 
 
-K_REPO_MONITOR = RepositoryMonitor()
+K_REPO_MONITOR = RepositoryMonitor.instance()
 
 
 class Repository:
     """
     A repository of metastat as a RESTful API endpoint.
     """
+    _cache = None  # type: list[Repository] | None
 
     def __init__(self, name: str, uri: str):
         """Initialize the repository instance."""
@@ -52,6 +54,8 @@ class Repository:
     @classmethod
     def load(cls) -> list[Repository]:
         """Load the repositories list from user preferences."""
+        if cls._cache is not None:
+            return list(cls._cache)
         repos = []  # type: list[Repository]
         settings = QtCore.QSettings()
         for index in range(settings.beginReadArray('metastat/repositories')):
@@ -60,7 +64,9 @@ class Repository:
                 name=settings.value('name'),
                 uri=settings.value('uri'),
             ))
-        return repos
+        settings.endArray()
+        cls._cache = repos
+        return list(repos)
 
     @classmethod
     def save(cls, repositories: list[Repository]) -> None:
@@ -72,4 +78,5 @@ class Repository:
             settings.setValue('name', repo.name)
             settings.setValue('uri', repo.uri)
         settings.endArray()
+        cls._cache = list(repositories)
         K_REPO_MONITOR.sgnUpdated.emit()
@@ -4,7 +4,9 @@ from abc import (
     ABCMeta,
     abstractmethod,
 )
+import functools
 import json
+import math
 from pathlib import Path
 from typing import Any
 
@@ -37,12 +39,21 @@ from eddy.ui.fields import (
 from eddy.ui import images_rc
 
 from .dialogs import RepositoryManagerDialog
-from .model import NamedEntity
+from .model import (
+    NamedEntity,
+    encode,
+)
 from .settings import (
     K_REPO_MONITOR,
     Repository,
 )
-from .style import stylesheet
+from .style import getStylesheet
+
+try:
+    # Faster decoding of large repository payloads when available
+    from orjson import loads as jsonLoads
+except ImportError:
+    jsonLoads = json.loads
 
 LOGGER = getLogger()
 
@@ -73,35 +84,29 @@ class MetastatWidget(QtWidgets.QWidget):
         settings = QtCore.QSettings()
 
         self.entities = None
+        self.entityCache = {}  # Entities parsed from the last reply, by id
+        self.entityCacheUrl = None
+        self.requestId = 0  # Identifies the latest metadata request
+        self.parsePool = QtCore.QThreadPool(self)  # Parses replies, see stopParsing()
+        self.parsePool.setMaxThreadCount(1)
+        self.parseSignals = RepositoryParseSignals(self)
+        self.repositories = {}  # Known repositories, by name
+        self.refreshRepositories()
 
         ########################################
         # ENTITY-TYPE ICONS
         ##############################
 
-        self.variablePixmap = QtGui.QPixmap(18, 18)
-        self.variablePixmap.fill(self.VARIABLE_COLOR)
-        variablePainter = QtGui.QPainter(self.variablePixmap)
-        variablePainter.setPen(QtCore.Qt.gray)
-        variablePainter.drawText(self.variablePixmap.rect(), QtCore.Qt.AlignCenter, 'V')
-        self.variableIcon = QtGui.QIcon(self.variablePixmap)
-        self.unitTypePixmap = QtGui.QPixmap(18, 18)
-        self.unitTypePixmap.fill(self.UNIT_TYPE_COLOR)
-        unitTypePainter = QtGui.QPainter(self.unitTypePixmap)
-        unitTypePainter.setPen(QtCore.Qt.gray)
-        unitTypePainter.drawText(self.unitTypePixmap.rect(), QtCore.Qt.AlignCenter, 'U')
-        self.unitTypeIcon = QtGui.QIcon(self.unitTypePixmap)
-        self.classificationPixmap = QtGui.QPixmap(18, 18)
-        self.classificationPixmap.fill(self.CLASSIFICATION_TYPE_COLOR)
-        classificationPainter = QtGui.QPainter(self.classificationPixmap)
-        classificationPainter.setPen(QtCore.Qt.gray)
-        classificationPainter.drawText(self.unitTypePixmap.rect(), QtCore.Qt.AlignCenter, 'Cl')
-        self.classificationIcon = QtGui.QIcon(self.classificationPixmap)
-        self.categoryPixmap = QtGui.QPixmap(18, 18)
-        self.categoryPixmap.fill(self.CATEGORY_TYPE_COLOR)
-        categoryPainter = QtGui.QPainter(self.categoryPixmap)
-        categoryPainter.setPen(QtCore.Qt.gray)
-        categoryPainter.drawText(self.unitTypePixmap.rect(), QtCore.Qt.AlignCenter, 'Ct')
-        self.categoryIcon = QtGui.QIcon(self.categoryPixmap)
+        self.variableIcon = entityTypeIcon('V', self.VARIABLE_COLOR.name())
+        self.unitTypeIcon = entityTypeIcon('U', self.UNIT_TYPE_COLOR.name())
+        self.classificationIcon = entityTypeIcon('Cl', self.CLASSIFICATION_TYPE_COLOR.name())
+        self.categoryIcon = entityTypeIcon('Ct', self.CATEGORY_TYPE_COLOR.name())
+        self.typeIcons = {
+            'category': self.categoryIcon,
+            'classification': self.classificationIcon,
+            'unit-type': self.unitTypeIcon,
+            'variable': self.variableIcon,
+        }
 
         ########################################
         # REPOSITORY FIELDS
@@ -119,7 +124,7 @@ class MetastatWidget(QtWidgets.QWidget):
         self.checkEntitiesButton.setIconSize(QtCore.QSize(18, 18))
         self.checkEntitiesButton.setToolTip('Check ontology entities sync')
         self.repoCombobox = QtWidgets.QComboBox(self)
-        self.repoCombobox.addItems(map(lambda r: r.name, Repository.load()))
+        self.repoCombobox.addItems(list(self.repositories))
         self.repoCombobox.setCurrentIndex(settings.value('metastat/index', 0, int))
 
         ########################################
@@ -173,13 +178,17 @@ class MetastatWidget(QtWidgets.QWidget):
         self.ownerField.setPlaceholderText('Search in project owner...')
         self.model = QtGui.QStandardItemModel(self)
         self.proxy = MetastatFilterProxyModel(self)
-        self.proxy.setDynamicSortFilter(False)
-        self.proxy.setFilterCaseSensitivity(QtCore.Qt.CaseInsensitive)
+        self.proxy.setDynamicSortFilter(False)  # Sorted explicitly after each batch of changes
+        self.proxy.setFilterCaseSensitivity(QtCore.Qt.CaseSensitive)
         self.proxy.setSortCaseSensitivity(QtCore.Qt.CaseSensitive)
         self.proxy.setSourceModel(self.model)
         self.entityview = MetastatView(self)
         self.entityview.setModel(self.proxy)
+        self.entityview.sortByColumn(0, QtCore.Qt.AscendingOrder)
         self.details = MetastatInfoWidget(self)
+        self.filterTimer = QtCore.QTimer(self)
+        self.filterTimer.setSingleShot(True)
+        self.filterTimer.setInterval(150)
 
         ########################################
         # WIDGET LAYOUT
@@ -222,7 +231,7 @@ class MetastatWidget(QtWidgets.QWidget):
 
         self.setContentsMargins(0, 0, 0, 0)
         self.setMinimumWidth(216)
-        self.setStyleSheet(stylesheet)
+        self.setStyleSheet(getStylesheet())
         self.refreshButton.setFixedSize(30, self.repoButton.sizeHint().height())
         self.checkEntitiesButton.setFixedSize(30, self.repoButton.sizeHint().height())
 
@@ -230,19 +239,22 @@ class MetastatWidget(QtWidgets.QWidget):
         connect(self.repoButton.clicked, self.doEditRepositories)
         connect(self.refreshButton.clicked, self.doRefreshRepository)
         connect(self.checkEntitiesButton.clicked, self.onCheckEntitiesSync)
-        connect(self.searchIRI.textChanged, self.doFilterIRI)
+        connect(self.searchIRI.textChanged, self.doScheduleFilter)
         connect(self.searchIRI.returnPressed, self.onReturnPressed)
         connect(self.typeField.currentTextChanged, self.doFilterType)
-        connect(self.lemmaField.textChanged, self.doFilterLemma)
+        connect(self.lemmaField.textChanged, self.doScheduleFilter)
         connect(self.lemmaField.returnPressed, self.onReturnPressed)
-        connect(self.descriptionField.textChanged, self.doFilterDescription)
+        connect(self.descriptionField.textChanged, self.doScheduleFilter)
         connect(self.descriptionField.returnPressed, self.onReturnPressed)
-        connect(self.ownerField.textChanged, self.doFilterOwner)
+        connect(self.ownerField.textChanged, self.doScheduleFilter)
         connect(self.ownerField.returnPressed, self.onReturnPressed)
+        connect(self.filterTimer.timeout, self.doApplyTextFilters)
         connect(self.entityview.activated, self.onItemActivated)
         connect(self.entityview.doubleClicked, self.onItemDoubleClicked)
         connect(self.entityview.pressed, self.onItemPressed)
         connect(K_REPO_MONITOR.sgnUpdated, self.onRepositoryUpdated)
+        connect(self.parseSignals.sgnCompleted, self.onParseCompleted)
+        connect(self.parseSignals.sgnFailed, self.onParseFailed)
         # connect(self.sgnItemActivated, self.session.doFocusItem)
         # connect(self.sgnItemDoubleClicked, self.session.doFocusItem)
         # connect(self.sgnItemRightClicked, self.session.doFocusItem)
@@ -297,7 +309,7 @@ class MetastatWidget(QtWidgets.QWidget):
         """
         # noinspection PyArgumentList
         if QtWidgets.QApplication.mouseButtons() == QtCore.Qt.NoButton:
-            item = self.model.itemFromIndex(self.proxy.mapToSource(index))
+            item = self.itemFromProxyIndex(index)
             if item:
                 self.details.entity = item.data()
                 self.sgnItemActivated.emit(item)
@@ -315,7 +327,7 @@ class MetastatWidget(QtWidgets.QWidget):
         """
         # noinspection PyArgumentList
         if QtWidgets.QApplication.mouseButtons() & QtCore.Qt.LeftButton:
-            item = self.model.itemFromIndex(self.proxy.mapToSource(index))
+            item = self.itemFromProxyIndex(index)
             if item:
                 self.details.entity = item.data()
                 #self.details.repository = item.data().repository
@@ -330,7 +342,7 @@ class MetastatWidget(QtWidgets.QWidget):
         """
         # noinspection PyArgumentList
         if QtWidgets.QApplication.mouseButtons() & QtCore.Qt.LeftButton:
-            item = self.model.itemFromIndex(self.proxy.mapToSource(index))
+            item = self.itemFromProxyIndex(index)
             if item:
                 self.details.entity = item.data()
                 #self.details.repository = item.data().repository
@@ -338,13 +350,15 @@ class MetastatWidget(QtWidgets.QWidget):
                 self.details.stack()
 
     @QtCore.pyqtSlot(int)
-    def onRepositoryChanged(self, index):
+    def onRepositoryChanged(self, index, refresh=False):
         """
         Executed when the selected repository in the combobox changes.
+        When `refresh` is set, the data is fetched from the network even if a fresh copy is cached.
         """
-        name = self.repoCombobox.itemText(index)
-        repo = first(Repository.load(), filter_on_item=lambda i: i.name == name)
+        repo = self.repositories.get(self.repoCombobox.itemText(index))
+        self.requestId += 1
         self.model.clear()
+        self.entityview.clearDragCache()
         self.refreshTypeOptions()
         if repo:
             settings = QtCore.QSettings()
@@ -353,8 +367,17 @@ class MetastatWidget(QtWidgets.QWidget):
             url = QtCore.QUrl(repo.uri)
             url.setPath(f'{url.path()}')
             request = QtNetwork.QNetworkRequest(url)
+            # Qt already negotiates gzip/deflate and decodes the body transparently,
+            # setting Accept-Encoding by hand would disable that.
+            request.setAttribute(QtNetwork.QNetworkRequest.Http2AllowedAttribute, True)
+            if refresh:
+                request.setAttribute(
+                    QtNetwork.QNetworkRequest.CacheLoadControlAttribute,
+                    QtNetwork.QNetworkRequest.AlwaysNetwork,
+                )
             # request.setAttribute(MetadataRequest.RepositoryAttribute, repo)
-            reply = self.session.nmanager.get(request)
+            reply = self.plugin.nmanager.get(request)
+            reply.setProperty('requestId', self.requestId)
             connect(reply.finished, self.onRequestCompleted)
         else:
             repo = None
@@ -366,18 +389,21 @@ class MetastatWidget(QtWidgets.QWidget):
     def onRepositoryUpdated(self):
         """Executed when the list of repositories is updated."""
         settings = QtCore.QSettings()
-        index = settings.value('metastat/index', 0, int)
-        repos = Repository.load()
-        if len(repos) > 0:
+        self.refreshRepositories()
+        # Rebuild the combobox silently, then load the selected repository once
+        blocker = QtCore.QSignalBlocker(self.repoCombobox)
+        if self.repositories:
             self.repoCombobox.clear()
-            self.repoCombobox.addItems(map(lambda r: r.name, repos))
+            self.repoCombobox.addItems(list(self.repositories))
             self.repoCombobox.setCurrentIndex(0)
             settings.setValue('metastat/index', self.repoCombobox.currentIndex())
         else:
             self.repoCombobox.clear()
             self.repoCombobox.setCurrentIndex(-1)
             settings.remove('metastat/index')
+        del blocker
         settings.sync()
+        self.onRepositoryChanged(self.repoCombobox.currentIndex())
 
     @QtCore.pyqtSlot()
     def doEditRepositories(self):
@@ -390,7 +416,7 @@ class MetastatWidget(QtWidgets.QWidget):
         """Executed to reload data from the selected metastat repository."""
         settings = QtCore.QSettings()
         index = settings.value('metastat/index', 0, int)
-        self.onRepositoryChanged(index)
+        self.onRepositoryChanged(index, refresh=True)
 
     @QtCore.pyqtSlot()
     def onCheckEntitiesSync(self):
@@ -502,9 +528,19 @@ class MetastatWidget(QtWidgets.QWidget):
                     node.updateNode(selected=False, valid=False, color=QtGui.QColor("orange"))
 
     @QtCore.pyqtSlot(str)
-    def doFilterIRI(self, text):
-        """Executed to filter items in the treeview by IRI."""
-        self.proxy.setIriFilter(text)
+    def doScheduleFilter(self, _text):
+        """Executed when a search field changes to (re)start the filter timer."""
+        self.filterTimer.start()
+
+    @QtCore.pyqtSlot()
+    def doApplyTextFilters(self):
+        """Executed when the filter timer expires to filter items in the treeview by the search fields."""
+        self.proxy.setTextFilters(
+            self.searchIRI.text(),
+            self.lemmaField.text(),
+            self.descriptionField.text(),
+            self.ownerField.text(),
+        )
         self.details.entity = None
         self.details.stack()
 
@@ -515,27 +551,6 @@ class MetastatWidget(QtWidgets.QWidget):
         self.details.entity = None
         self.details.stack()
 
-    @QtCore.pyqtSlot(str)
-    def doFilterLemma(self, text):
-        """Executed to filter items in the treeview by lemma."""
-        self.proxy.setLemmaFilter(text)
-        self.details.entity = None
-        self.details.stack()
-
-    @QtCore.pyqtSlot(str)
-    def doFilterDescription(self, text):
-        """Executed to filter items in the treeview by description."""
-        self.proxy.setDescriptionFilter(text)
-        self.details.entity = None
-        self.details.stack()
-
-    @QtCore.pyqtSlot(str)
-    def doFilterOwner(self, text):
-        """Executed to filter items in the treeview by owner."""
-        self.proxy.setOwnerFilter(text)
-        self.details.entity = None
-        self.details.stack()
-
     @QtCore.pyqtSlot()
     @QtCore.pyqtSlot(str)
     @QtCore.pyqtSlot(str, str)
@@ -558,6 +573,7 @@ class MetastatWidget(QtWidgets.QWidget):
         """
         settings = QtCore.QSettings()
         settings.value('ontology/iri/render', IRIRender.FULL.value)
+        self.refreshItemTexts()
         self.redraw()
 
     @QtCore.pyqtSlot()
@@ -567,27 +583,69 @@ class MetastatWidget(QtWidgets.QWidget):
         """
         self.focusNextChild()
 
+    @QtCore.pyqtSlot(int, str)
+    def onParseFailed(self, requestId, error):
+        """
+        Executed when the data of a metadata request could not be parsed.
+        """
+        if requestId == self.requestId:
+            LOGGER.error(f'Failed to retrieve metastat data: {error}')
+            self.session.addNotification("""
+            <b><font color="#7E0B17">ERROR</font></b>:
+            Failed to retrieve metastat data.
+            See System Log for details.
+            """)
+
+    @QtCore.pyqtSlot(int, object)
+    def onParseCompleted(self, requestId, result):
+        """
+        Executed when the data of a metadata request has been parsed to update the widget.
+        """
+        if requestId != self.requestId:
+            return  # Superseded by a later request
+        self.entities, rows = result
+        items = []
+        for d, entity, text, filterKey, children in rows:
+            item = QtGui.QStandardItem(entityIcon(d, self), text)
+            item.setData(entity)
+            item.setData(filterKey, MetastatFilterProxyModel.FilterKeyRole)
+            for child, childEntity, childText in children:
+                childItem = QtGui.QStandardItem(entityIcon(child, self), childText)
+                childItem.setData(childEntity)
+                # Related entities are shown whenever their parent matches
+                childItem.setData(filterKey, MetastatFilterProxyModel.FilterKeyRole)
+                item.appendRow(childItem)
+            items.append(item)
+        self.model.invisibleRootItem().appendRows(items)
+        self.proxy.sort(0, QtCore.Qt.AscendingOrder)
+        self.refreshTypeOptions()
+
     @QtCore.pyqtSlot()
     def onRequestCompleted(self):
         """
-        Executed when a metadata request has completed to update the widget.
+        Executed when a metadata request has completed to parse its data in a worker thread.
         """
         reply = self.sender()
         try:
             reply.deleteLater()
+            if reply.property('requestId') != self.requestId:
+                return  # Superseded by a later request
             if reply.isFinished() and reply.error() == QtNetwork.QNetworkReply.NoError:
-                data = json.loads(str(reply.readAll(), encoding='utf-8'))
-                self.entities = { d['id']: d for d in data }  # Lookup table for entities by id
-                for d in data:
-                    item = QtGui.QStandardItem(entityIcon(d, self), entityText(d))
-                    item.setData(NamedEntity.from_dict(d))
-                    for rel_id in d.get('related', []):
-                        child = self.entities.get(rel_id, {})
-                        childItem = QtGui.QStandardItem(entityIcon(child, self), entityText(child))
-                        childItem.setData(NamedEntity.from_dict(child))
-                        item.appendRow(childItem)
-                    self.model.appendRow(item)
-                self.refreshTypeOptions()
+                # A reply served from the HTTP cache is unchanged since it was last parsed
+                url = reply.url()
+                fromCache = reply.attribute(QtNetwork.QNetworkRequest.SourceIsFromCacheAttribute)
+                if not fromCache or url != self.entityCacheUrl:
+                    self.entityCache = {}
+                    self.entityCacheUrl = url
+                worker = RepositoryParseWorker(
+                    self.requestId,
+                    bytes(reply.readAll()),
+                    self.entityCache,
+                    renderConfig(),
+                    self.parseSignals,
+                )
+                self.parsePool.clear()  # Queued parses are stale by now
+                self.parsePool.start(worker)
             elif reply.isFinished() and reply.error() != QtNetwork.QNetworkReply.NetworkError.NoError:
                 msg = f'Failed to retrieve metastat data: {reply.errorString()}'
                 LOGGER.warning(msg)
@@ -643,9 +701,45 @@ class MetastatWidget(QtWidgets.QWidget):
         """
         Redraw the content of the widget.
         """
-        self.entityview.update()
+        self.entityview.viewport().update()
         self.details.redraw()
 
+    def refreshItemTexts(self) -> None:
+        """
+        Render again the text of every item, to be called when IRI rendering changes.
+        """
+        config = renderConfig()
+        root = self.model.invisibleRootItem()
+        for row in range(root.rowCount()):
+            item = root.child(row)
+            item.setText(entityText(item.data(), config))
+            for childRow in range(item.rowCount()):
+                child = item.child(childRow)
+                child.setText(entityText(child.data(), config))
+        # Dynamic sorting is disabled, so restore the order once for the new texts
+        self.proxy.sort(0, QtCore.Qt.AscendingOrder)
+
+    def refreshRepositories(self) -> None:
+        """
+        Reload the known repositories, indexing them by name.
+        """
+        self.repositories = {repo.name: repo for repo in Repository.load()}
+
+    def stopParsing(self) -> None:
+        """
+        Discard the queued reply parses and wait for the running one, to be called before disposing the widget.
+        The parse signals are owned by the widget, so no worker must outlive it.
+        """
+        self.requestId += 1  # Results still to be delivered are stale
+        self.parsePool.clear()
+        self.parsePool.waitForDone()
+
+    def itemFromProxyIndex(self, index: QtCore.QModelIndex) -> QtGui.QStandardItem | None:
+        """
+        Returns the model item for the given index of the filter proxy, if any.
+        """
+        return self.model.itemFromIndex(self.proxy.mapToSource(index))
+
     def findMetastatOriginAnnotationAssertion(self, iri):
         annotations = iri.annotationAssertions
         for annotation in annotations:
@@ -716,6 +810,8 @@ class MetastatView(QtWidgets.QTreeView):
         """
         super().__init__(parent)
         self.startPos = None
+        self.dragCache = {}  # Encoded drag payload and its entity, by entity id
+        self.placeholder = (-1, '')  # Elided placeholder text, by viewport width
         self.setContextMenuPolicy(QtCore.Qt.ContextMenuPolicy.PreventContextMenu)
         self.setEditTriggers(QtWidgets.QTreeView.NoEditTriggers)
         self.setFocusPolicy(QtCore.Qt.FocusPolicy.StrongFocus)
@@ -771,21 +867,25 @@ class MetastatView(QtWidgets.QTreeView):
             if distance >= QtWidgets.QApplication.startDragDistance():
                 index = first(self.selectedIndexes())
                 if index:
-                    model = self.model().sourceModel()
-                    index = self.model().mapToSource(index)
-                    item = model.itemFromIndex(index)
-                    data = item.data()
-                    if data and isinstance(data, NamedEntity):
+                    # QStandardItem.data() stores in UserRole + 1 by default
+                    data = index.data(QtCore.Qt.UserRole + 1)
+                    if isinstance(data, NamedEntity):
                         mimeData = QtCore.QMimeData()
-                        buf = QtCore.QByteArray()
-                        buf.append(json.dumps(data.to_dict(deep=True)))
-                        mimeData.setData('application/json+metastat', buf)
+                        mimeData.setData('application/json+metastat', self.dragPayload(data))
                         mimeData.setText(data.id)
                         drag = QtGui.QDrag(self)
                         drag.setMimeData(mimeData)
                         drag.exec_(QtCore.Qt.DropAction.CopyAction)
         super().mouseMoveEvent(mouseEvent)
 
+    def changeEvent(self, event: QtCore.QEvent) -> None:
+        """
+        Discards the elided placeholder text when the font changes.
+        """
+        if event.type() == QtCore.QEvent.FontChange:
+            self.placeholder = (-1, '')
+        super().changeEvent(event)
+
     def paintEvent(self, event: QtGui.QPaintEvent):
         """
         Overrides paintEvent to display a placeholder text.
@@ -793,45 +893,46 @@ class MetastatView(QtWidgets.QTreeView):
         super().paintEvent(event)
         if self.model().rowCount() == 0:
             painter = QtGui.QPainter(self.viewport())
-            painter.save()
             painter.setPen(self.palette().placeholderText().color())
-            fm = self.fontMetrics()
-            bgMsg = 'No Metadata Available'
-            elided_text = fm.elidedText(bgMsg, QtCore.Qt.ElideRight, self.viewport().width())
-            painter.drawText(self.viewport().rect(), QtCore.Qt.AlignCenter, elided_text)
-            painter.restore()
+            width = self.viewport().width()
+            if self.placeholder[0] != width:
+                fm = self.fontMetrics()
+                bgMsg = 'No Metadata Available'
+                self.placeholder = (width, fm.elidedText(bgMsg, QtCore.Qt.ElideRight, width))
+            painter.drawText(self.viewport().rect(), QtCore.Qt.AlignCenter, self.placeholder[1])
 
     #############################################
     #   INTERFACE
     #################################
 
-    def sizeHintForColumn(self, column: int) -> int:
+    def clearDragCache(self) -> None:
         """
-        Returns the size hint for the given column.
-        This will make the column of the treeview as wide as the widget that contains the view.
+        Discard the encoded drag payloads, to be called when the model is reloaded.
         """
-        return max(super().sizeHintForColumn(column), self.viewport().width())
+        self.dragCache.clear()
 
-    def update(self, index: QtCore.QModelIndex = None):
+    def dragPayload(self, entity: NamedEntity) -> QtCore.QByteArray:
         """
-        Update the view for the given index (if any).
+        Returns the JSON drag payload for the given entity, encoded on its first drag.
         """
-        proxy = self.model()
+        cached = self.dragCache.get(entity.id)
+        if cached is None or cached[0] is not entity:
+            payload = QtCore.QByteArray(json.dumps(entity, default=encode).encode('utf-8'))
+            cached = self.dragCache[entity.id] = (entity, payload)
+        return cached[1]
 
-        if index:
-            item = proxy.sourceModel().itemFromIndex(proxy.mapToSource(index))
-            item.setText(entityText(item.data().to_dict(deep=True)))
-            super().update(index)
-        else:
-            for row in range(self.model().rowCount()):
-                index = self.model().index(row, 0)
-                item = proxy.sourceModel().itemFromIndex(proxy.mapToSource(index))
-                item.setText(entityText(item.data().to_dict(deep=True)))
-            super().update()
+    def sizeHintForColumn(self, column: int) -> int:
+        """
+        Returns the size hint for the given column.
+        This will make the column of the treeview as wide as the widget that contains the view.
+        """
+        return max(super().sizeHintForColumn(column), self.viewport().width())
 
 
 class MetastatFilterProxyModel(QtCore.QSortFilterProxyModel):
     """Extends QSortFilterProxyModel adding filtering functionalities for the metastat widget."""
+    FilterKeyRole = QtCore.Qt.UserRole + 2
+
     def __init__(self, parent=None):
         super().__init__(parent)
 
@@ -841,73 +942,115 @@ class MetastatFilterProxyModel(QtCore.QSortFilterProxyModel):
         self.filter_description = ""
         self.filter_owner = ""
 
+        self.setFilterRole(self.FilterKeyRole)
+        self.setFilterKeyColumn(0)
+
     #############################################
     #   INTERFACE
     #################################
 
     def setIriFilter(self, text):
-        self.filter_iri = text
-        self.invalidateFilter()
+        self.filter_iri = text.lower()
+        self.updateFilterPattern()
 
     def setTypeFilter(self, text):
         # "" = no filter
         self.filter_type = text.strip().lower()
-        self.invalidateFilter()
+        self.updateFilterPattern()
 
     def setLemmaFilter(self, text):
-        self.filter_lemma = text
-        self.invalidateFilter()
+        self.filter_lemma = text.lower()
+        self.updateFilterPattern()
 
     def setDescriptionFilter(self, text):
-        self.filter_description = text
-        self.invalidateFilter()
+        self.filter_description = text.lower()
+        self.updateFilterPattern()
 
     def setOwnerFilter(self, text):
-        self.filter_owner = text
-        self.invalidateFilter()
-
-    def filterAcceptsRow(self, sourceRow, sourceParent):
-        model = self.sourceModel()
-        item = model.itemFromIndex(model.index(sourceRow, 0))
-        data = item.data()
-        if data:
-            if isinstance(data, NamedEntity):
-                iri = data.iri
-                varType = data.type
-                lemmas = data.lemma
-                descriptions = data.description
-                owner = data.owner
-            else:
-                return False
-        else:
-            return False
+        self.filter_owner = text.lower()
+        self.updateFilterPattern()
+
+    def setTextFilters(self, iri, lemma, description, owner):
+        self.filter_iri = iri.lower()
+        self.filter_lemma = lemma.lower()
+        self.filter_description = description.lower()
+        self.filter_owner = owner.lower()
+        self.updateFilterPattern()
+
+    def updateFilterPattern(self):
+        """
+        Compose the active filters into a single regular expression matched against
+        the filter key of each item (see `entityFilterKey`), so that filtering runs
+        entirely in QSortFilterProxyModel without calling back into Python.
+        Both the key and the filters are lowercase, so the match is case-sensitive.
+        """
+        escape = QtCore.QRegularExpression.escape
+        lookaheads = []
+        if self.filter_iri:
+            lookaheads.append(rf'(?=[^\x1f]*{escape(self.filter_iri)})')
+        if self.filter_type:
+            lookaheads.append(rf'(?=[^\x1f]*\x1f{escape(self.filter_type)}\x1f)')
+        if self.filter_lemma:
+            lookaheads.append(rf'(?=(?:[^\x1f]*\x1f){{2}}[^\x1f]*{escape(self.filter_lemma)})')
+        if self.filter_description:
+            lookaheads.append(rf'(?=(?:[^\x1f]*\x1f){{3}}[^\x1f]*{escape(self.filter_description)})')
+        if self.filter_owner:
+            # Entities without an owner are not filtered out
+            lookaheads.append(rf'(?=(?:[^\x1f]*\x1f){{4}}(?:$|[^\x1f]*{escape(self.filter_owner)}))')
+        pattern = '^' + ''.join(lookaheads) if lookaheads else ''
+        if pattern != self.filterRegularExpression().pattern():
+            self.setFilterRegularExpression(QtCore.QRegularExpression(pattern))
 
-        if self.filter_iri and self.filter_iri.lower() not in iri.lower():
-            return False
 
-        if self.filter_type and self.filter_type != varType.lower():
-            return False
+class RepositoryParseSignals(QtCore.QObject):
+    """
+    Signals of RepositoryParseWorker, owned by the widget so that they are delivered in the GUI thread.
+    """
+    sgnCompleted = QtCore.pyqtSignal(int, object)
+    sgnFailed = QtCore.pyqtSignal(int, str)
 
-        if self.filter_lemma:
-            lemma_contains = False
-            for l in lemmas:
-                if self.filter_lemma.lower() in l.value.lower():
-                    lemma_contains = True
-            if not lemma_contains:
-                return False
 
-        if self.filter_description:
-            description_contains = False
-            for d in descriptions:
-                if self.filter_description.lower() in d.value.lower():
-                    description_contains = True
-            if not description_contains:
-                return False
+class RepositoryParseWorker(QtCore.QRunnable):
+    """
+    Decodes the data of a metadata request and builds its entities off the GUI thread.
+    Items are created by the widget once the result is delivered, as Qt requires.
+    """
+    def __init__(self, requestId: int, raw: bytes, cache: dict, config: tuple[IRIRender, str],
+                 signals: RepositoryParseSignals) -> None:
+        """
+        Initialize the worker.
+        """
+        super().__init__()
+        self.requestId = requestId
+        self.raw = raw
+        self.cache = cache
+        self.config = config
+        self.signals = signals
 
-        if self.filter_owner and owner.name and self.filter_owner.lower() not in owner.name.lower():
-            return False
+    def run(self) -> None:
+        """
+        Parse the data, emitting the entities lookup table and one tuple per row.
+        """
+        try:
+            data = jsonLoads(self.raw)
+            entities = {d['id']: d for d in data}  # Lookup table for entities by id
+            rows = []
+            for d in data:
+                entity = NamedEntity.from_dict(d, cache=self.cache)
+                children = []
+                for rel_id in d.get('related', []):
+                    child = entities.get(rel_id)
+                    if child is None:
+                        LOGGER.warning('Unknown related entity "%s" of entity "%s"', rel_id, d['id'])
+                        continue
+                    childEntity = NamedEntity.from_dict(child, cache=self.cache)
+                    children.append((child, childEntity, entityText(childEntity, self.config)))
+                rows.append((d, entity, entityText(entity, self.config), entityFilterKey(entity), children))
+        except Exception as e:
+            self.signals.sgnFailed.emit(self.requestId, str(e))
+        else:
+            self.signals.sgnCompleted.emit(self.requestId, (entities, rows))
 
-        return True
 
 class MetastatInfoWidget(QtWidgets.QScrollArea):
     """
@@ -920,12 +1063,13 @@ class MetastatInfoWidget(QtWidgets.QScrollArea):
         super().__init__(parent)
 
         self.entity = None
+        self.redrawPending = False
+        self.stackPending = False  # Set when stack() is deferred until the widget is shown
         self.stacked = QtWidgets.QStackedWidget(self)
         self.stacked.setContentsMargins(0, 0, 0, 0)
         self.infoEmpty = EmptyInfo(self.stacked)
-        self.infoEntity = EntityInfo(self.stacked)
+        self.infoEntity = None  # Created on first use
         self.stacked.addWidget(self.infoEmpty)
-        self.stacked.addWidget(self.infoEntity)
         self.setContentsMargins(0, 0, 0, 0)
         self.setMinimumSize(QtCore.QSize(216, 120))
         self.setHorizontalScrollBarPolicy(QtCore.Qt.ScrollBarAlwaysOff)
@@ -933,79 +1077,49 @@ class MetastatInfoWidget(QtWidgets.QScrollArea):
         self.setWidget(self.stacked)
         self.setWidgetResizable(True)
 
-        self.setStyleSheet("""
-        MetastatInfoWidget {
-          background: #FFFFFF;
-        }
-        MetastatInfoWidget Header {
-          background: #5A5050;
-          padding-left: 4px;
-          color: #FFFFFF;
-        }
-        MetastatInfoWidget Key {
-          background: #BBDEFB;
-          border-top: none;
-          border-right: none;
-          border-bottom: 1px solid #BBDEFB;
-          border-left: none;
-          padding: 0 0 0 4px;
-        }
-        MetastatInfoWidget Button,
-        MetastatInfoWidget Button:focus,
-        MetastatInfoWidget Button:hover,
-        MetastatInfoWidget Button:hover:focus,
-        MetastatInfoWidget Button:pressed,
-        MetastatInfoWidget Button:pressed:focus,
-        MetastatInfoWidget Text,
-        MetastatInfoWidget Integer,
-        MetastatInfoWidget String,
-        MetastatInfoWidget Select,
-        MetastatInfoWidget Parent {
-          background: #E3F2FD;
-          border-top: none;
-          border-right: none;
-          border-bottom: 1px solid #BBDEFB !important;
-          border-left: 1px solid #BBDEFB !important;
-          padding: 0 0 0 4px;
-          text-align:left;
-        }
-        MetastatInfoWidget Button::menu-indicator {
-          image: none;
-        }
-        MetastatInfoWidget Select:!editable,
-        MetastatInfoWidget Select::drop-down:editable {
-          background: #FFFFFF;
-        }
-        MetastatInfoWidget Select:!editable:on,
-        MetastatInfoWidget Select::drop-down:editable:on {
-          background: #FFFFFF;
-        }
-        MetastatInfoWidget QCheckBox {
-          background: #FFFFFF;
-          spacing: 0;
-          margin-left: 4px;
-          margin-top: 2px;
-        }
-        MetastatInfoWidget QCheckBox::indicator:disabled {
-          background-color: #BABABA;
-        }
-        """)
+        self.setStyleSheet(getStylesheet('info.qss'))
 
-        scrollbar = self.verticalScrollBar()
-        scrollbar.installEventFilter(self)
+        connect(self.verticalScrollBar().rangeChanged, self.doScrollRangeChanged)
 
     #############################################
     #   EVENTS
     #################################
 
-    def eventFilter(self, source: QtCore.QObject, event: QtCore.QEvent) -> bool:
+    def resizeEvent(self, event: QtGui.QResizeEvent) -> None:
+        """
+        Executed when the widget is resized.
+        """
+        super().resizeEvent(event)
+        self.scheduleRedraw()
+
+    def showEvent(self, event: QtGui.QShowEvent) -> None:
         """
-        Filter incoming events.
+        Executed when the widget is shown, to catch up on the work skipped while it was hidden.
         """
-        if source is self.verticalScrollBar():
-            if event.type() in {QtCore.QEvent.Show, QtCore.QEvent.Hide}:
-                self.redraw()
-        return super().eventFilter(source, event)
+        super().showEvent(event)
+        if self.stackPending:
+            self.stack()
+        if self.redrawPending:
+            self.redraw()
+
+    #############################################
+    #   SLOTS
+    #################################
+
+    @QtCore.pyqtSlot(int, int)
+    def doScrollRangeChanged(self, _min: int, _max: int) -> None:
+        """
+        Executed when the content height changes, which may show or hide the scrollbar.
+        """
+        self.scheduleRedraw()
+
+    @QtCore.pyqtSlot()
+    def doRedraw(self) -> None:
+        """
+        Executed on the event loop iteration following scheduleRedraw to redraw the widget.
+        """
+        if self.redrawPending:
+            self.redraw()
 
     #############################################
     #   INTERFACE
@@ -1015,31 +1129,47 @@ class MetastatInfoWidget(QtWidgets.QScrollArea):
         """
         Redraw the content of the widget.
         """
+        if not self.isVisible():
+            self.redrawPending = True  # Redraw when shown
+            return
+        self.redrawPending = False  # Any scheduled redraw is satisfied by this one
         width = self.width()
         scrollbar = self.verticalScrollBar()
         if scrollbar.isVisible():
             width -= scrollbar.width()
         widget = self.stacked.currentWidget()
         widget.setFixedWidth(width)
-        sizeHint = widget.sizeHint()
-        height = sizeHint.height()
         self.stacked.setFixedWidth(width)
-        # self.stacked.setFixedHeight(clamp(height, 0))
+
+    def scheduleRedraw(self) -> None:
+        """
+        Schedule the widget to be redrawn, coalescing repeated requests into one redraw.
+        """
+        if not self.redrawPending:
+            self.redrawPending = True
+            QtCore.QTimer.singleShot(0, self.doRedraw)
 
     def stack(self) -> None:
         """
         Set the current stacked widget.
         """
+        if not self.isVisible():
+            self.stackPending = True  # Stack when shown
+            return
+        self.stackPending = False
         if self.entity:
+            if self.infoEntity is None:
+                self.infoEntity = EntityInfo(self.stacked)
+                self.stacked.addWidget(self.infoEntity)
             show = self.infoEntity
             show.updateData(self.entity)
         else:
             show = self.infoEmpty
 
         prev = self.stacked.currentWidget()
-        self.stacked.setCurrentWidget(show)
-        self.redraw()
         if prev is not show:
+            self.stacked.setCurrentWidget(show)
+            self.scheduleRedraw()
             scrollbar = self.verticalScrollBar()
             scrollbar.setValue(0)
 
@@ -1066,15 +1196,21 @@ class Key(QtWidgets.QLabel):
     """
     This class implements the key of an info field.
     """
+    fixedSize = (88, 20)
+
     def __init__(self, *args: Any) -> None:
         """
         Initialize the key.
         """
         super().__init__(*args)
-        if "Lemma" in args[0] or "Description" in args[0]:
-            self.setFixedSize(88, 40)
-        else:
-            self.setFixedSize(88, 20)
+        self.setFixedSize(*self.fixedSize)
+
+
+class ValueKey(Key):
+    """
+    This class implements the key of an info field showing a (possibly long) annotation value.
+    """
+    fixedSize = (88, 40)
 
 
 class Button(QtWidgets.QPushButton):
@@ -1117,13 +1253,40 @@ class Text(TextField):
     """
     This class implements the string value of an info field.
     """
-    def __init__(self,  *args: Any) -> None:
+    def __init__(self, value: str, parent: QtWidgets.QWidget = None) -> None:
         """
         Initialize the field.
         """
-        super().__init__(*args)
-        self.setFixedHeight(20 * (self.document().lineCount() + 1))
+        super().__init__(parent)
+        self.setFixedHeight(self.heightFor(value))
         self.setReadOnly(True)
+        connect(self.document().documentLayout().documentSizeChanged, self.doFitContent)
+        # Passing the value to the constructor would read it as rich text
+        self.setValue(value)
+
+    @QtCore.pyqtSlot(QtCore.QSizeF)
+    def doFitContent(self, size: QtCore.QSizeF) -> None:
+        """
+        Executed when the laid out document changes size, to fit the field to its content.
+        This accounts for wrapped lines, and never makes the field shorter than its key.
+        """
+        height = max(math.ceil(size.height()) + 2 * self.frameWidth(), ValueKey.fixedSize[1])
+        if height != self.height():
+            self.setFixedHeight(height)
+
+    @staticmethod
+    def heightFor(value: str) -> int:
+        """
+        Returns the estimated height of a field showing the given value, used until its document is laid out.
+        Lines are counted from the value so that no text layout is needed.
+        """
+        return 20 * (value.count('\n') + 2)
+
+    def setValue(self, value: str) -> None:
+        """
+        Set the text of the field, which is resized to fit once laid out.
+        """
+        self.setPlainText(value)
 
 
 class Select(ComboBox):
@@ -1151,16 +1314,8 @@ class Parent(QtWidgets.QWidget):
         """
         super().__init__(*args)
         self.setFixedHeight(20)
-
-    def paintEvent(self, paintEvent: QtGui.QPaintEvent) -> None:
-        """
-        This is needed for the widget to pick the stylesheet.
-        """
-        option = QtWidgets.QStyleOption()
-        option.initFrom(self)
-        painter = QtGui.QPainter(self)
-        style = self.style()
-        style.drawPrimitive(QtWidgets.QStyle.PE_Widget, option, painter, self)
+        # Let Qt paint the stylesheet background, as plain QWidget subclasses do not
+        self.setAttribute(QtCore.Qt.WA_StyledBackground, True)
 
 
 #############################################
@@ -1203,21 +1358,18 @@ class EntityInfo(AbstractInfo):
         super().__init__(parent)
 
         self.entity = None
+        self.pendingEntity = None
         self.ownerKey = Key('Owner', self)
         self.ownerField = String(self)
-        self.ownerField.setReadOnly(True)
 
         self.idKey = Key('Entity ID', self)
         self.idField = String(self)
-        self.idField.setReadOnly(True)
 
         self.iriKey = Key('Entity IRI', self)
         self.iriField = String(self)
-        self.iriField.setReadOnly(True)
 
         self.typeKey = Key('Type', self)
         self.typeField = String(self)
-        self.typeField.setReadOnly(True)
 
         self.nodePropHeader = Header('Entity properties', self)
         self.nodePropLayout = QtWidgets.QFormLayout()
@@ -1230,6 +1382,11 @@ class EntityInfo(AbstractInfo):
         self.metadataHeader = Header('Entity Annotations', self)
         self.metadataLayout = QtWidgets.QFormLayout()
         self.metadataLayout.setSpacing(0)
+        self.metadataLayout.setVerticalSpacing(2)
+        self.metadataSignatures = []  # (key, value, lang) of the annotations currently shown
+        self.keyPool = {}  # Detached annotation widgets, kept for reuse
+        self.stringPool = []
+        self.textPool = []
 
         self.mainLayout = QtWidgets.QVBoxLayout(self)
         self.mainLayout.setAlignment(QtCore.Qt.AlignTop)
@@ -1240,14 +1397,39 @@ class EntityInfo(AbstractInfo):
         self.mainLayout.addWidget(self.metadataHeader)
         self.mainLayout.addLayout(self.metadataLayout)
 
+    #############################################
+    #   SLOTS
+    #################################
+
+    @QtCore.pyqtSlot()
+    def doApplyPendingData(self) -> None:
+        """
+        Executed on the event loop iteration following updateData to show the last requested entity.
+        """
+        entity, self.pendingEntity = self.pendingEntity, None
+        if entity is not None:
+            self.applyData(entity)
+
     #############################################
     #   INTERFACE
     #################################
 
     def updateData(self, entity: NamedEntity) -> None:
         """
-        Fetch new information and fill the widget with data.
+        Schedule the widget to be filled with the given entity data.
+        Rapid successive calls are coalesced, so that only the last entity is shown.
+        """
+        if self.pendingEntity is None:
+            if entity is self.entity:
+                return  # Already shown
+            QtCore.QTimer.singleShot(0, self.doApplyPendingData)
+        self.pendingEntity = entity
+
+    def applyData(self, entity: NamedEntity) -> None:
+        """
+        Fill the widget with the given entity data.
         """
+        self.entity = entity
         self.idField.setValue(entity.id)
         if entity.owner:
             self.ownerField.setValue(entity.owner.name)
@@ -1256,77 +1438,191 @@ class EntityInfo(AbstractInfo):
             self.typeField.setValue(entity.type)
 
         # ENTITY ANNOTATIONS
-        while self.metadataLayout.rowCount() > 0:
-            self.metadataLayout.removeRow(0)
-        for lemma in entity.lemma:
-            value, lang = lemma.value, lemma.lang
-            self.metadataLayout.addRow(Key('Lemma', self), Text(value, self))
-            if lang:
-                self.metadataLayout.addRow(Key('Language', self), String(lang, self))
-            self.metadataLayout.addItem(QtWidgets.QSpacerItem(10, 2))
-        for description in entity.description:
-            value, lang = description.value, description.lang
-            self.metadataLayout.addRow(Key('Description', self), Text(value, self))
-            if lang:
-                self.metadataLayout.addRow(Key('Language', self), String(lang, self))
-            self.metadataLayout.addItem(QtWidgets.QSpacerItem(10, 2))
+        # Only rebuild the rows following the first annotation that changed
+        signatures = [('Lemma', lemma.value, lemma.lang) for lemma in entity.lemma]
+        signatures.extend(('Description', desc.value, desc.lang) for desc in entity.description)
+        if signatures == self.metadataSignatures:
+            return
+        common = 0
+        row = 0
+        for old, new in zip(self.metadataSignatures, signatures):
+            if old != new:
+                break
+            common += 1
+            row += 2 if old[2] else 1
+        # Lay out and repaint once, after all the rows are in place
+        self.setUpdatesEnabled(False)
+        try:
+            self.releaseMetadataRows(row)
+            for key, value, lang in signatures[common:]:
+                self.addAnnotationRows(key, value, lang)
+            self.metadataSignatures = signatures
+            self.metadataLayout.activate()
+        finally:
+            self.setUpdatesEnabled(True)
+
+    def addAnnotationRows(self, key: str, value: str, lang: str | None) -> None:
+        """
+        Append the rows showing an annotation with the given key, value and language.
+        """
+        self.metadataLayout.addRow(self.acquireKey(ValueKey, key), self.acquireText(value))
+        if lang:
+            self.metadataLayout.addRow(self.acquireKey(Key, 'Language'), self.acquireString(lang))
+
+    def acquireKey(self, keyType: type[Key], label: str) -> Key:
+        """
+        Returns a key of the given type with the given label, reusing a detached one if available.
+        """
+        pool = self.keyPool.get(label)
+        if pool:
+            widget = pool.pop()
+            widget.show()
+            return widget
+        return keyType(label, self)
+
+    def acquireString(self, value: str) -> String:
+        """
+        Returns a string field showing the given value, reusing a detached one if available.
+        """
+        if self.stringPool:
+            widget = self.stringPool.pop()
+            widget.setValue(value)
+            widget.show()
+            return widget
+        return String(value, self)
+
+    def acquireText(self, value: str) -> Text:
+        """
+        Returns a text field showing the given value, reusing a detached one if available.
+        """
+        if self.textPool:
+            widget = self.textPool.pop()
+            widget.setValue(value)
+            widget.show()
+            return widget
+        return Text(value, self)
+
+    def releaseMetadataRows(self, start: int) -> None:
+        """
+        Take the annotation rows from `start` onwards out of the layout,
+        hiding their widgets and keeping them for reuse.
+        """
+        layout = self.metadataLayout
+        for index in reversed(range(start, layout.rowCount())):
+            result = layout.takeRow(index)
+            for item in (result.labelItem, result.fieldItem):
+                widget = item.widget() if item is not None else None
+                if isinstance(widget, Key):
+                    self.keyPool.setdefault(widget.text(), []).append(widget)
+                elif isinstance(widget, Text):
+                    self.textPool.append(widget)
+                elif isinstance(widget, String):
+                    self.stringPool.append(widget)
+                else:
+                    continue
+                widget.hide()
 
 class EmptyInfo(QtWidgets.QTextEdit):
     """
     This class implements the information box when there is no metastat repository.
     """
+    def __init__(self, *args: Any) -> None:
+        """
+        Initialize the information box.
+        """
+        super().__init__(*args)
+        self.placeholder = (-1, '')  # Elided placeholder text, by viewport width
 
     #############################################
-    #   INTERFACE
+    #   EVENTS
     #################################
 
+    def changeEvent(self, event: QtCore.QEvent) -> None:
+        """
+        Discards the elided placeholder text when the font changes.
+        """
+        if event.type() == QtCore.QEvent.FontChange:
+            self.placeholder = (-1, '')
+        super().changeEvent(event)
+
     def paintEvent(self, event: QtGui.QPaintEvent):
         """
         Overrides paintEvent to display a placeholder text.
         """
         super().paintEvent(event)
+        # The painter is discarded after this paint, so its state needs no restoring
         painter = QtGui.QPainter(self.viewport())
-        painter.save()
         painter.setPen(self.palette().placeholderText().color())
-        fm = self.fontMetrics()
-        bgMsg = 'Click on a list item to see more info.'
-        elided_text = fm.elidedText(bgMsg, QtCore.Qt.ElideRight, self.viewport().width())
-        painter.drawText(self.viewport().rect(), QtCore.Qt.AlignCenter, elided_text)
-        painter.restore()
+        width = self.viewport().width()
+        if self.placeholder[0] != width:
+            fm = self.fontMetrics()
+            bgMsg = 'Click on a list item to see more info.'
+            self.placeholder = (width, fm.elidedText(bgMsg, QtCore.Qt.ElideRight, width))
+        painter.drawText(self.viewport().rect(), QtCore.Qt.AlignCenter, self.placeholder[1])
 
 
-def entityText(item: dict) -> str:
+def renderConfig() -> tuple[IRIRender, str]:
     """
-    Returns the text for the response json object based on IRI render preferences.
+    Returns the IRI rendering mode and the label language from the settings.
     """
     settings = QtCore.QSettings()
     rendering = IRIRender(settings.value('ontology/iri/render', IRIRender.FULL.value, str))
     lang = settings.value('ontology/iri/render/language', 'en', str)
+    return rendering, lang
+
+
+def entityText(entity: NamedEntity, config: tuple[IRIRender, str] | None = None) -> str:
+    """
+    Returns the text for the given entity based on IRI render preferences.
+    When rendering many items, pass the result of `renderConfig()` to avoid reading the settings each time.
+    """
+    rendering, lang = config or renderConfig()
 
     if rendering == IRIRender.LABEL:
-        lemma = first(filter(lambda i: i['lang'] == lang, item['lemma']))
-        if lemma and lemma['value']:
-            return lemma['value']
+        lemma = next((i for i in entity.lemma if i.lang == lang), None)
+        if lemma and lemma.value:
+            return lemma.value
         else:
-            LOGGER.warning('Missing lemma for entity "%s", lang tag: %s', item['id'], lang)
-            return item['id']
+            LOGGER.warning('Missing lemma for entity "%s", lang tag: %s', entity.id, lang)
+            return entity.id
     else:
-        return item['id']
+        return entity.id
+
+
+def entityFilterKey(entity: NamedEntity) -> str:
+    """
+    Returns the lowercase string matched by the filter proxy for the given entity.
+    Fields (IRI, type, lemmas, descriptions, owner) are separated by the unit
+    separator character, multiple lemmas and descriptions by the record separator.
+    """
+    return '\x1f'.join((
+        entity.iri,
+        entity.type or '',
+        '\x1e'.join(lemma.value for lemma in entity.lemma),
+        '\x1e'.join(description.value for description in entity.description),
+        (entity.owner.name or '') if entity.owner else '',
+    )).lower()
+
+
+@functools.cache
+def entityTypeIcon(text: str, color: str) -> QtGui.QIcon:
+    """
+    Returns the icon for an entity type, drawing it on first use.
+    """
+    pixmap = QtGui.QPixmap(18, 18)
+    pixmap.fill(QtGui.QColor(color))
+    painter = QtGui.QPainter(pixmap)
+    painter.setPen(QtCore.Qt.gray)
+    painter.drawText(pixmap.rect(), QtCore.Qt.AlignCenter, text)
+    painter.end()
+    return QtGui.QIcon(pixmap)
 
 
 def entityIcon(item: dict, widget: MetastatWidget) -> QtGui.QIcon | None:
     """
     Returns the icon for the response json object based on item type.
     """
-    if item['type'] == 'category':
-        itemIcon = widget.categoryIcon
-    elif item['type'] == 'classification':
-        itemIcon = widget.classificationIcon
-    elif item['type'] == 'unit-type':
-        itemIcon = widget.unitTypeIcon
-    elif item['type'] == 'variable':
-        itemIcon = widget.variableIcon
-    else:
+    itemIcon = widget.typeIcons.get(item['type'])
+    if itemIcon is None:
         LOGGER.warning(f'Unknown metastat type: {item["type"]}')
-        itemIcon = None
     return itemIcon